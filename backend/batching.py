@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Collect items submitted by concurrent requests for up to `max_wait_ms`
+    (or until `max_batch` items are queued) and hand them to `batch_fn` in a
+    single call, so the model runs one batched forward instead of N.
+
+    Batches run on one dedicated worker thread; use `run()` for other model
+    work (e.g. warmup) that must share that thread's compiled CUDA graphs.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch: int = 16,
+        max_wait_ms: float = 10.0,
+    ) -> None:
+        self._batch_fn = batch_fn
+        self._max_batch = max(1, max_batch)
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: Optional["asyncio.Queue[Tuple[Any, asyncio.Future]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Batch currently being collected or run; failed on stop() if unfinished
+        self._current: List[Tuple[Any, asyncio.Future]] = []
+
+    async def start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._drain_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Fail everything that was queued or in flight, so no submit() hangs
+        pending = self._current
+        self._current = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._queue = None
+
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher stopped."))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the batch worker thread and wait for its result."""
+        if self._executor is None:
+            raise RuntimeError("MicroBatcher.start() has not been called.")
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its entry of the batched result."""
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher.start() has not been called.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = self._current = [await self._queue.get()]
+        deadline = loop.time() + self._max_wait
+
+        while len(batch) < self._max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _drain_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+
+            try:
+                # Run the model off the event loop; one batch in flight at a time
+                results = await loop.run_in_executor(self._executor, self._batch_fn, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._current = []
+                continue
+
+            for (_, future), result in zip(batch, results):
+                # Skip requests whose client already went away
+                if not future.done():
+                    future.set_result(result)
+
+            self._current = []
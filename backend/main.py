@@ -1,12 +1,25 @@
+import asyncio
+import atexit
+import logging
+import logging.handlers
 import os
-import shutil
-import tempfile
+import queue
+import sys
 import time
 from typing import Any, Dict, List
 
 from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from utils import predict_image
+from batching import MicroBatcher
+from utils import (
+    BATCH_MAX_SIZE,
+    get_cached_result,
+    predict_prepared,
+    prepare_image,
+    trim_cuda_cache,
+    warmup_model,
+)
 
 app = FastAPI(title="Farm Advisor API")
 
@@ -18,14 +31,83 @@ app.add_middleware(
 )
 
 
-def log(message: str) -> None:
-    print(f"[{time.strftime('%H:%M:%S')}] {message}")
+# Uncached /analyze requests arriving within BATCH_MAX_WAIT_MS share one forward
+batcher = MicroBatcher(
+    predict_prepared,
+    max_batch=BATCH_MAX_SIZE,
+    max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "10")),
+)
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """
+    Route log records through an unbounded queue so request handlers only
+    enqueue; a background thread does the (blocking) stdout writes.
+    """
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S")
+    )
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+_setup_logging()
+logger = logging.getLogger(__name__)
+
+
+# Uploads up to this size are read into memory; larger ones are decoded from disk
+MAX_INMEM_UPLOAD_BYTES = int(os.getenv("MAX_INMEM_UPLOAD_MB", "10")) * 1024 * 1024
+
+CUDA_CACHE_TRIM_INTERVAL_S = float(os.getenv("CUDA_CACHE_TRIM_INTERVAL_S", "60"))
+_cache_trim_task = None
+
+
+async def _trim_cuda_cache_periodically() -> None:
+    while True:
+        await asyncio.sleep(CUDA_CACHE_TRIM_INTERVAL_S)
+        try:
+            # empty_cache() synchronises the device, so run it between batches
+            # on the inference thread rather than blocking the event loop
+            await batcher.run(trim_cuda_cache)
+        except Exception as e:
+            logger.error("CUDA cache trim failed: %s", e)
 
 
 @app.on_event("startup")
 async def startup_event():
-    log("Backend starting up... Model will be loaded lazily from utils.py")
-    log("Backend ready to receive requests.")
+    global _cache_trim_task
+
+    logger.info("Backend starting up... Preloading model from utils.py")
+    await batcher.start()
+    # Warm up on the batcher's thread so compiled graphs are reused by real batches
+    await batcher.run(warmup_model)
+    _cache_trim_task = asyncio.create_task(_trim_cuda_cache_periodically())
+    logger.info("Backend ready to receive requests.")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _cache_trim_task is not None:
+        _cache_trim_task.cancel()
+    await batcher.stop()
+
+
+def _is_supported_image(head: bytes) -> bool:
+    """Check the first 12 bytes for a JPEG, PNG or WEBP signature."""
+    return (
+        head.startswith(b"\xff\xd8\xff")
+        or head.startswith(b"\x89PNG\r\n\x1a\n")
+        or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+    )
 
 
 @app.get("/")
@@ -37,33 +119,48 @@ async def root():
 async def analyze_field(file: UploadFile = File(...)) -> List[Dict[str, Any]]:
     start_time = time.time()
     original_name = file.filename or "upload"
-    log(f"Received file: {original_name}")
-
-    if not (file.content_type or "").startswith("image/"):
-        log(f"Rejected non-image upload: {file.content_type}")
+    logger.info("Received file: %s", original_name)
+
+    # Sniff the real format instead of trusting the client's Content-Type.
+    # Starlette has already spooled the body by now, so this saves the decode
+    # and model work for bad uploads, not the upload I/O itself
+    head = await file.read(12)
+    await file.seek(0)
+    if not _is_supported_image(head):
+        logger.info("Rejected non-image upload: %s", file.content_type)
         raise HTTPException(status_code=400, detail="Only image uploads are supported.")
 
-    suffix = os.path.splitext(original_name)[1]
-    temp_file_path = None
-
     try:
-        # Save upload to a temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            temp_file_path = tmp.name
-            shutil.copyfileobj(file.file, tmp)
-
-        log(f"File saved as {temp_file_path}")
-        log("🔥 Calling predict_image()")
-
-        results = predict_image(temp_file_path)
-
-        log(
-            f"🔥 Prediction returned: {results} "
-            f"in {time.time() - start_time:.2f} seconds"
-        )
+        # Typical phone photos are decoded from memory; anything larger is
+        # decoded straight from Starlette's spooled temp file, not re-copied.
+        # Starlette sets file.size for multipart uploads; only if it's missing do
+        # we have to read (up to the limit + 1 byte) to learn the size
+        data = None
+        if file.size is None or file.size <= MAX_INMEM_UPLOAD_BYTES:
+            data = await file.read(MAX_INMEM_UPLOAD_BYTES + 1)
+            if len(data) > MAX_INMEM_UPLOAD_BYTES:
+                data = None
+
+        # Decoding and hashing run in the threadpool so they never block the loop
+        if data is not None:
+            logger.info("Read %d bytes from upload", len(data))
+            prepared = await run_in_threadpool(prepare_image, data)
+        else:
+            logger.info("Large upload; decoding from the spooled file")
+            await file.seek(0)
+            prepared = await run_in_threadpool(prepare_image, file.file)
+
+        # Cache hits are answered here, without waiting on the batch window
+        results = get_cached_result(prepared[1])
+        if results is None:
+            logger.info("🔥 Submitting image to inference batcher")
+            results = await batcher.submit(prepared)
+
+        logger.info("🔥 Prediction done in %.2f seconds", time.time() - start_time)
+        logger.debug("Prediction returned: %s", results)
 
     except Exception as e:
-        log(f"Prediction error: {e}")
+        logger.error("Prediction error: %s", e)
         results = [
             {
                 "label": "Error",
@@ -74,12 +171,5 @@ async def analyze_field(file: UploadFile = File(...)) -> List[Dict[str, Any]]:
                           "Please try another image.",
             }
         ]
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                log(f"Temporary file {temp_file_path} removed")
-            except Exception as e:
-                log(f"Error removing temp file: {e}")
 
     return results
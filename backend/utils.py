@@ -1,9 +1,30 @@
+import io
+import logging
 import os
-from typing import Any, Dict, List
-
-import torch
-from PIL import Image
-from transformers import pipeline
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+# Must be set before torch initialises CUDA: grow segments instead of
+# fragmenting the caching allocator on small GPUs
+os.environ.setdefault(
+    "PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128"
+)
+
+import imagehash  # noqa: E402
+import torch  # noqa: E402
+from PIL import Image  # noqa: E402
+from torchvision import transforms as T  # noqa: E402
+from torchvision.transforms.functional import pil_to_tensor  # noqa: E402
+from transformers import (  # noqa: E402
+    AutoConfig,
+    AutoImageProcessor,
+    AutoModelForImageClassification,
+)
+
+logger = logging.getLogger(__name__)
 
 # ============================
 # 1. Load model ID from environment ONLY
@@ -17,8 +38,98 @@ if not HF_MODEL_ID:
         "Run the project using setup.sh / docker-compose or export it manually."
     )
 
+# Weights are cached where HF_HOME / HUGGINGFACE_HUB_CACHE point (transformers
+# reads them itself); docker-compose mounts a volume there so restarts don't re-download
+
 _device = "cuda" if torch.cuda.is_available() else "cpu"
-_pipe = None  # HF pipeline (lazy-loaded)
+
+# With several uvicorn workers on CPU, cap intra-op threads per worker
+# (e.g. cores / workers) to avoid oversubscription
+TORCH_NUM_THREADS = os.getenv("TORCH_NUM_THREADS")
+if TORCH_NUM_THREADS:
+    torch.set_num_threads(int(TORCH_NUM_THREADS))
+
+# Inference precision: "auto" → FP16 on CUDA, FP32 on CPU. "bf16" is worth
+# trying on CPUs with AVX512-BF16/AMX or on Ampere+ GPUs.
+_DTYPES = {"fp32": torch.float32, "fp16": torch.float16, "bf16": torch.bfloat16}
+HF_DTYPE = os.getenv("HF_DTYPE", "auto").lower()
+
+if HF_DTYPE == "auto":
+    _dtype = torch.float16 if _device == "cuda" else torch.float32
+elif HF_DTYPE in _DTYPES:
+    _dtype = _DTYPES[HF_DTYPE]
+else:
+    raise EnvironmentError(
+        f"Unsupported HF_DTYPE '{HF_DTYPE}'. Use one of: auto, {', '.join(_DTYPES)}."
+    )
+
+if _device == "cpu" and _dtype == torch.float16:
+    # Half-precision matmuls are poorly supported on CPU
+    logger.warning("[HF] HF_DTYPE=fp16 is not supported on CPU; using fp32 instead.")
+    _dtype = torch.float32
+
+# Inference runtime: "torch" (transformers model) or "onnx" (ONNX Runtime
+# session over a model exported once with
+# `optimum-cli export onnx --model $HF_MODEL_ID --task image-classification <dir>`)
+HF_BACKEND = os.getenv("HF_BACKEND", "torch").lower()
+HF_ONNX_PATH = os.getenv("HF_ONNX_PATH", "onnx/model.onnx")
+
+if HF_BACKEND not in ("torch", "onnx"):
+    raise EnvironmentError(
+        f"Unsupported HF_BACKEND '{HF_BACKEND}'. Use one of: torch, onnx."
+    )
+
+# Optional post-training quantization for CPU deployments ("int8" or "none")
+HF_QUANTIZE = os.getenv("HF_QUANTIZE", "none").lower()
+
+if HF_QUANTIZE not in ("none", "int8"):
+    raise EnvironmentError(
+        f"Unsupported HF_QUANTIZE '{HF_QUANTIZE}'. Use one of: none, int8."
+    )
+
+# torch.compile the classifier: "auto" → only on CUDA (CPU needs a C toolchain).
+# If compilation fails during warmup the eager model is used instead.
+HF_COMPILE = os.getenv("HF_COMPILE", "auto").lower()
+_use_compile = HF_BACKEND == "torch" and (
+    HF_COMPILE in ("1", "true") or (HF_COMPILE == "auto" and _device == "cuda")
+)
+
+# Largest batch the model is run with. When compiled, batches are padded up to
+# a power of two (or BATCH_MAX_SIZE) so only these shapes are ever compiled,
+# and warmup_model compiles all of them before traffic.
+BATCH_MAX_SIZE = max(1, int(os.getenv("BATCH_MAX_SIZE", "16")))
+_BATCH_BUCKETS = sorted(
+    {min(1 << i, BATCH_MAX_SIZE) for i in range(BATCH_MAX_SIZE.bit_length() + 1)}
+)
+
+# CNN backbones (HF config.model_type) that run faster in channels_last layout
+_CNN_MODEL_TYPES = {
+    "convnext",
+    "convnextv2",
+    "efficientnet",
+    "mobilenet_v1",
+    "mobilenet_v2",
+    "regnet",
+    "resnet",
+}
+
+_processor = None  # HF image processor (loaded at startup via warmup_model)
+_model = None  # HF classification model (loaded at startup via warmup_model)
+_channels_last = False  # set for CNN backbones, which prefer NHWC
+_transform = None  # TorchScript preprocessing built from the processor (or None)
+
+# Release cached-but-unused CUDA memory only past this much slack (never per request)
+CUDA_CACHE_RELEASE_MB = int(os.getenv("CUDA_CACHE_RELEASE_MB", "512"))
+
+# Uploads are downscaled on decode so their short side is at most this many px
+PRE_RESIZE_MIN_SIDE = int(os.getenv("PRE_RESIZE_MIN_SIDE", "256"))
+
+# LRU of final results keyed by perceptual hash, so re-uploads of the same
+# (or near-identical) photo skip the model entirely. Read from the request
+# handlers, written from the inference thread, hence the lock.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+_result_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
 
 # -----------------------------
 # 2. Domain knowledge (safe, static)
@@ -68,33 +179,295 @@ DISEASE_TO_NUTRIENT: Dict[str, str] = {
     "Rust": "Potassium",
 }
 
+# DISEASE_GUIDE flattened at import: lowercased label → row index into
+# parallel tuples, so advice assembly is one dict hit plus tuple indexing
+_LABEL_IDX: Dict[str, int] = {
+    label.lower(): i for i, label in enumerate(DISEASE_GUIDE)
+}
+_SUMMARIES = tuple(info["summary"] for info in DISEASE_GUIDE.values())
+_FIELD_ACTIONS = tuple(info.get("field_action") for info in DISEASE_GUIDE.values())
+_EXTRAS = tuple(info.get("extra") for info in DISEASE_GUIDE.values())
+
+# Lowercased once at import; checked in insertion order on every request
+_DISEASE_TO_NUTRIENT_LOWER = tuple(
+    (key.lower(), nutrient) for key, nutrient in DISEASE_TO_NUTRIENT.items()
+)
+
 # ============================
-# 3. Model loading (lazy, using pipeline)
+# 3. Model loading (preloaded at startup, processor + model)
 # ============================
 
 
-def _load_hf_pipeline():
-    """Lazy-load a Hugging Face image-classification pipeline."""
-    global _pipe
+def _load_hf_model():
+    """Load (once) the Hugging Face image processor and classification model."""
+    global _processor, _model, _transform, _channels_last
 
-    if _pipe is None:
-        print(f"[HF] Loading pipeline for '{HF_MODEL_ID}' on device={_device} ...")
-        device_index = 0 if _device == "cuda" else -1
+    if _model is None:
+        logger.info(
+            "[HF] Loading model '%s' on device=%s, dtype=%s ...",
+            HF_MODEL_ID,
+            _device,
+            _dtype,
+        )
 
         try:
-            _pipe = pipeline(
-                task="image-classification",
-                model=HF_MODEL_ID,
-                device=device_index,
-            )
+            processor = AutoImageProcessor.from_pretrained(HF_MODEL_ID)
+            if HF_BACKEND == "onnx":
+                model = _load_onnx_model()
+            else:
+                model = AutoModelForImageClassification.from_pretrained(
+                    HF_MODEL_ID, torch_dtype=_dtype
+                )
         except Exception as e:
             raise RuntimeError(
-                f"❌ Failed to load HuggingFace pipeline for '{HF_MODEL_ID}'. Error: {e}"
+                f"❌ Failed to load HuggingFace model '{HF_MODEL_ID}'. Error: {e}"
+            )
+
+        if HF_BACKEND == "torch":
+            # Inference-only service: no gradients on the weights
+            model = model.to(_device).eval().requires_grad_(False)
+
+            # oneDNN and tensor cores both prefer NHWC for convolutions
+            if model.config.model_type in _CNN_MODEL_TYPES:
+                model = model.to(memory_format=torch.channels_last)
+                _channels_last = True
+
+            if HF_QUANTIZE == "int8":
+                model = _quantize_int8(model)
+
+            if _use_compile:
+                # Image size is fixed by the processor and batches are padded to
+                # _BATCH_BUCKETS, so specialise kernels to those shapes and let
+                # CUDA graphs amortise launch overhead.
+                dynamo_config = torch._dynamo.config
+                dynamo_config.cache_size_limit = max(
+                    dynamo_config.cache_size_limit, len(_BATCH_BUCKETS)
+                )
+                model = torch.compile(model, mode="reduce-overhead", dynamic=False)
+                logger.info("[HF] Model wrapped with torch.compile (compiles on warmup).")
+
+        elif HF_QUANTIZE == "int8":
+            logger.warning(
+                "[HF] HF_QUANTIZE=int8 is ignored with HF_BACKEND=onnx; "
+                "quantize the exported model with onnxruntime.quantization instead."
             )
 
-        print("[HF] Pipeline loaded successfully.")
+        _processor, _model = processor, model
+        _transform = _build_transform(processor)
+        logger.info("[HF] Model loaded successfully.")
 
-    return _pipe
+    return _processor, _model
+
+
+class _OnnxClassifier:
+    """
+    Stand-in for the transformers model backed by an ONNX Runtime session:
+    called with pixel_values, returns an object with `.logits`, and exposes
+    the HF `config` for id2label.
+    """
+
+    def __init__(self, session, config) -> None:
+        self.session = session
+        self.config = config
+        model_input = session.get_inputs()[0]
+        self._input_name = model_input.name
+        # FP16 exports (optimum-cli --dtype fp16) expect half-precision inputs
+        self._input_dtype = "float16" if model_input.type == "tensor(float16)" else "float32"
+
+    def __call__(self, pixel_values: torch.Tensor) -> SimpleNamespace:
+        feeds = {self._input_name: pixel_values.numpy().astype(self._input_dtype)}
+        logits = self.session.run(None, feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def _load_onnx_model() -> _OnnxClassifier:
+    """Open HF_ONNX_PATH with full graph optimizations on the best available provider."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise RuntimeError(
+            "HF_BACKEND=onnx requires onnxruntime (or onnxruntime-gpu) to be installed."
+        )
+
+    preferred = ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+    if _device == "cuda":
+        preferred.insert(0, "CUDAExecutionProvider")
+    available = set(ort.get_available_providers())
+    providers = [p for p in preferred if p in available]
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = torch.get_num_threads()
+
+    session = ort.InferenceSession(HF_ONNX_PATH, sess_options=options, providers=providers)
+    logger.info(
+        "[HF] ONNX Runtime session for '%s' on %s", HF_ONNX_PATH, session.get_providers()
+    )
+
+    config = AutoConfig.from_pretrained(HF_MODEL_ID)
+    return _OnnxClassifier(session, config)
+
+
+# PIL resample filters the TorchScript transform reproduces
+_INTERPOLATIONS = {
+    Image.BILINEAR: T.InterpolationMode.BILINEAR,
+    Image.BICUBIC: T.InterpolationMode.BICUBIC,
+}
+
+
+def _build_transform(processor):
+    """
+    Rebuild the processor's resize → rescale → normalize as a TorchScript
+    module over uint8 tensors, avoiding the HF processor's per-image Python
+    loop. Returns None (use the HF processor) for processors we can't mirror:
+    shortest-edge resize, center crop, or resampling other than bilinear/bicubic.
+    """
+    size = getattr(processor, "size", None) or {}
+    interpolation = _INTERPOLATIONS.get(getattr(processor, "resample", Image.BILINEAR))
+    mirrorable = (
+        "height" in size
+        and "width" in size
+        and interpolation is not None
+        and getattr(processor, "do_resize", True)
+        and not getattr(processor, "do_center_crop", False)
+        and getattr(processor, "do_rescale", True)
+        and getattr(processor, "do_normalize", True)
+        and getattr(processor, "rescale_factor", 1 / 255) == 1 / 255
+    )
+    if not mirrorable:
+        logger.info("[HF] Using the HF image processor for preprocessing.")
+        return None
+
+    transform = torch.nn.Sequential(
+        T.Resize((size["height"], size["width"]), interpolation=interpolation, antialias=True),
+        T.ConvertImageDtype(torch.float32),
+        T.Normalize(processor.image_mean, processor.image_std),
+    )
+    logger.info("[HF] Using TorchScript preprocessing.")
+    return torch.jit.script(transform)
+
+
+def _padded_batch_size(n: int) -> int:
+    """Smallest warmed-up batch bucket that fits n images."""
+    return next(size for size in _BATCH_BUCKETS if size >= n)
+
+
+def _preprocess(images: List[Image.Image]) -> torch.Tensor:
+    """Turn RGB images into a (N, C, H, W) pixel_values batch on the model device."""
+    if _transform is None:
+        pixel_values = _processor(images=images, return_tensors="pt")["pixel_values"]
+    else:
+        pixel_values = torch.stack([_transform(pil_to_tensor(img)) for img in images])
+
+    if _use_compile:
+        # Zero-pad to a bucket size so the compiled graph never sees a new shape
+        pad = _padded_batch_size(len(images)) - len(images)
+        if pad:
+            pixel_values = torch.cat(
+                [pixel_values, pixel_values.new_zeros((pad, *pixel_values.shape[1:]))]
+            )
+
+    if HF_BACKEND == "onnx":
+        # ONNX Runtime takes host FP32 arrays; the session wrapper casts as needed
+        return pixel_values
+
+    # Cast to the model dtype so FP16/BF16 weights see matching inputs
+    pixel_values = pixel_values.to(_device, dtype=_dtype)
+    if _channels_last:
+        pixel_values = pixel_values.contiguous(memory_format=torch.channels_last)
+    return pixel_values
+
+
+def _quantize_int8(model):
+    """
+    Dynamic INT8 quantization of the Linear layers (absmax per-tensor scales),
+    so CPU inference uses int8 GEMMs via FBGEMM/oneDNN.
+    """
+    if _device != "cpu" or _dtype != torch.float32:
+        logger.info("[HF] HF_QUANTIZE=int8 only applies to FP32 on CPU; skipping.")
+        return model
+
+    model = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    logger.info("[HF] Applied dynamic INT8 quantization to Linear layers.")
+    return model
+
+
+@torch.inference_mode()
+def _classify_batch(images: List[Image.Image]) -> List[Tuple[str, float]]:
+    """Run one batched forward pass and return the top-1 (raw_label, score) per image."""
+    if len(images) > BATCH_MAX_SIZE:
+        return [
+            prediction
+            for start in range(0, len(images), BATCH_MAX_SIZE)
+            for prediction in _classify_batch(images[start:start + BATCH_MAX_SIZE])
+        ]
+
+    _, model = _load_hf_model()
+    pixel_values = _preprocess(images)
+
+    logits = model(pixel_values=pixel_values).logits
+
+    # Drop rows that only exist as batch padding
+    probs = logits[: len(images)].float().softmax(-1)
+    scores, indices = probs.max(dim=-1)
+    id2label = model.config.id2label
+    return [
+        (id2label[int(idx)], float(score))
+        for idx, score in zip(indices.tolist(), scores.tolist())
+    ]
+
+
+def warmup_model() -> None:
+    """
+    Load the model and run dummy inference so weight loading, CUDA kernel/cuDNN
+    initialisation and torch.compile happen before the first real request.
+    When compiled, every batch bucket is compiled and its CUDA graph recorded;
+    call this on the same thread that later runs real batches.
+    """
+    # Load outside _classify_batch's inference_mode so the weights are ordinary
+    # (non-inference) tensors
+    _load_hf_model()
+
+    global _model, _use_compile
+
+    dummy = Image.new("RGB", (224, 224))
+
+    if _use_compile:
+        try:
+            for size in _BATCH_BUCKETS:
+                # CUDA graphs are recorded on the second compiled call, so run twice
+                for _ in range(2):
+                    _classify_batch([dummy] * size)
+            logger.info("[HF] Warmup inference done for batch sizes %s.", _BATCH_BUCKETS)
+            return
+        except Exception as e:
+            # e.g. no C compiler for Triton, or a GPU below compute capability 7.0
+            logger.warning("[HF] torch.compile failed (%s); falling back to eager mode.", e)
+            _model = _model._orig_mod
+            _use_compile = False
+
+    _classify_batch([dummy])
+    logger.info("[HF] Warmup inference done.")
+
+
+def trim_cuda_cache() -> bool:
+    """
+    Return cached CUDA blocks to the driver when reserved-but-unallocated
+    memory exceeds CUDA_CACHE_RELEASE_MB. Meant for a slow periodic task:
+    emptying the cache on every request roughly halves throughput.
+    """
+    if _device != "cuda":
+        return False
+
+    slack = torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+    if slack <= CUDA_CACHE_RELEASE_MB * 1024 * 1024:
+        return False
+
+    torch.cuda.empty_cache()
+    logger.info("[HF] Released %.0f MiB of cached CUDA memory.", slack / 2**20)
+    return True
 
 
 # ============================
@@ -120,29 +493,39 @@ def _severity_from_score(score: float) -> str:
 
 def _guess_nutrient_from_label(label: str) -> str:
     label_lower = label.lower()
-    for key, nutrient in DISEASE_TO_NUTRIENT.items():
-        if key.lower() in label_lower:
+    for key, nutrient in _DISEASE_TO_NUTRIENT_LOWER:
+        if key in label_lower:
             return nutrient
     return "No deficiency"
 
 
 def _build_advice(label: str, nutrient: str, score: float) -> str:
-    severity = _severity_from_score(score)
-    disease_info = DISEASE_GUIDE.get(label, {})
+    # Advice only depends on these four values, so memoize on them
+    return _build_advice_cached(
+        label, nutrient, _severity_from_score(score), f"{score * 100:.1f}"
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_advice_cached(
+    label: str, nutrient: str, severity: str, confidence: str
+) -> str:
+    label_lower = label.lower()
+    idx = _LABEL_IDX.get(label_lower, -1)
     nutrient_info = NUTRIENT_GUIDE.get(nutrient, "")
 
     advice_parts: List[str] = []
 
-    if label.lower().startswith("healthy"):
+    if label_lower.startswith("healthy"):
         advice_parts.append("The crop appears healthy.")
         advice_parts.append("No visible signs of stress or disease.")
     else:
-        summary = disease_info.get("summary", f"Issue detected: {label}.")
+        summary = _SUMMARIES[idx] if idx >= 0 else f"Issue detected: {label}."
         advice_parts.append(
-            f"{summary} Severity: **{severity}** ({score * 100:.1f}% confidence)."
+            f"{summary} Severity: **{severity}** ({confidence}% confidence)."
         )
 
-    field_action = disease_info.get("field_action")
+    field_action = _FIELD_ACTIONS[idx] if idx >= 0 else None
     if field_action:
         advice_parts.append(f"Field Action: {field_action}")
 
@@ -153,7 +536,7 @@ def _build_advice(label: str, nutrient: str, score: float) -> str:
     else:
         advice_parts.append(f"Possible **{nutrient} deficiency**. {nutrient_info}")
 
-    extra = disease_info.get("extra")
+    extra = _EXTRAS[idx] if idx >= 0 else None
     if extra:
         advice_parts.append(f"Tip: {extra}")
 
@@ -167,29 +550,45 @@ def _build_advice(label: str, nutrient: str, score: float) -> str:
 # ============================
 
 
-def predict_image(image_path: str) -> List[Dict[str, Any]]:
+ImageSource = Union[str, bytes, BinaryIO, Image.Image]
+
+
+def load_image(source: ImageSource) -> Image.Image:
     """
-    Run the HF image-classification pipeline on the given image and
-    return the best prediction.
+    Decode an image into RGB from a path, in-memory bytes, a seekable binary
+    file object (e.g. a spooled upload) or an already-open PIL image.
     """
-    pipe = _load_hf_pipeline()
+    if isinstance(source, Image.Image):
+        image = source if source.mode == "RGB" else source.convert("RGB")
+        return _shrink(image)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
 
-    # Load image
-    image = Image.open(image_path).convert("RGB")
+    image = Image.open(source)
+    # JPEG-only fast path: decode at a reduced DCT scale (1/2 … 1/8) that still
+    # covers the requested size; silently a no-op for other formats
+    draft_side = 2 * PRE_RESIZE_MIN_SIDE
+    image.draft("RGB", (draft_side, draft_side))
+    return _shrink(image.convert("RGB"))
 
-    # Use padding=True as suggested by the HF error message
-    outputs = pipe(image, padding=True)
-    print("[HF] Raw pipeline outputs:", outputs)
 
-    if not outputs:
-        raise RuntimeError("Empty predictions from Hugging Face pipeline.")
+def _shrink(image: Image.Image) -> Image.Image:
+    """
+    Cap resolution so the short side is PRE_RESIZE_MIN_SIDE before the
+    (much more expensive) processor resize; the classifier only sees ~224px.
+    """
+    width, height = image.size
+    short_side = min(width, height)
+    if short_side <= PRE_RESIZE_MIN_SIDE:
+        return image
 
-    # Take the prediction with highest score
-    best = max(outputs, key=lambda o: float(o.get("score", 0.0)))
+    scale = PRE_RESIZE_MIN_SIDE / short_side
+    size = (round(width * scale), round(height * scale))
+    # Returns a new image, so a caller-supplied PIL image is never modified
+    return image.resize(size, Image.BILINEAR, reducing_gap=2.0)
 
-    raw_label = str(best.get("label", "Unknown"))
-    score = float(best.get("score", 0.0))
 
+def _build_results(raw_label: str, score: float) -> List[Dict[str, Any]]:
     human_label = _normalize_label(raw_label)
     nutrient = _guess_nutrient_from_label(human_label)
     advice = _build_advice(human_label, nutrient, score)
@@ -204,3 +603,84 @@ def predict_image(image_path: str) -> List[Dict[str, Any]]:
             "advice": advice,
         }
     ]
+
+
+def prepare_image(source: ImageSource) -> Tuple[Image.Image, str]:
+    """Decode an image (see load_image) and compute its result-cache key."""
+    image = load_image(source)
+    return image, str(imagehash.phash(image, hash_size=16))
+
+
+def get_cached_result(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Return a copy of the cached result for this image hash, if any."""
+    with _result_cache_lock:
+        cached = _result_cache.get(cache_key)
+        if cached is None:
+            return None
+        _result_cache.move_to_end(cache_key)
+
+    logger.debug("[HF] Cache hit for image hash %s", cache_key)
+    return [dict(r) for r in cached]
+
+
+def _store_result(cache_key: str, results: List[Dict[str, Any]]) -> None:
+    if RESULT_CACHE_SIZE <= 0:
+        return
+
+    with _result_cache_lock:
+        _result_cache[cache_key] = [dict(r) for r in results]
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+
+def predict_prepared(
+    items: List[Tuple[Image.Image, str]]
+) -> List[List[Dict[str, Any]]]:
+    """
+    Classify (image, cache_key) pairs from prepare_image in a single forward
+    pass, cache each result and return them in input order. Callers check
+    get_cached_result first, so only cache misses reach the model.
+    """
+    predictions = _classify_batch([image for image, _ in items])
+    logger.debug("[HF] Batch of %d → %s", len(items), predictions)
+
+    all_results = []
+    for (_, cache_key), (raw_label, score) in zip(items, predictions):
+        results = _build_results(raw_label, score)
+        _store_result(cache_key, results)
+        all_results.append(results)
+
+    return all_results
+
+
+def predict_images(images: List[Image.Image]) -> List[List[Dict[str, Any]]]:
+    """
+    Run the HF image-classification model on a batch of RGB images and
+    return the best prediction for each, in input order. Cached images are
+    answered directly; the rest share a single forward pass.
+    """
+    all_results: List[Any] = [None] * len(images)
+    misses: List[Tuple[int, Tuple[Image.Image, str]]] = []
+
+    for i, image in enumerate(images):
+        cache_key = str(imagehash.phash(image, hash_size=16))
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            all_results[i] = cached
+        else:
+            misses.append((i, (image, cache_key)))
+
+    if misses:
+        predictions = predict_prepared([item for _, item in misses])
+        for (i, _), results in zip(misses, predictions):
+            all_results[i] = results
+
+    return all_results
+
+
+def predict_image(image: ImageSource) -> List[Dict[str, Any]]:
+    """
+    Run the HF image-classification model on the given image (see
+    load_image for accepted sources) and return the best prediction.
+    """
+    return predict_images([load_image(image)])[0]
@@ -58,7 +58,7 @@ else
 fi
 
 echo "▶️ [Backend] Starting Uvicorn (http://localhost:8000)..."
-uvicorn main:app --reload --host 0.0.0.0 --port 8000 &
+uvicorn main:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools &
 BACKEND_PID=$!
 
 echo "✅ [Backend] Running with PID: $BACKEND_PID"